@@ -12,7 +12,7 @@ import config
 from utils import create_stock_screener
 from data_manager import DataManager
 from user_manager import UserManager
-from stock_manager import StockManager
+from stock_manager import StockManager, MARKET_CONDITIONS
 from ui_components import ChartView, HelpView, BalanceLeaderboardView, StockLeaderboardView
 
 logger = logging.getLogger('stock_exchange.admin_commands')
@@ -273,11 +273,8 @@ async def admin_bankrupt(ctx, target, bot=None):
                 await interaction.response.send_message("Only the user who initiated this command can confirm it.", ephemeral=True)
                 return
             
-            # Set price to 0 to trigger bankruptcy
-            StockManager.stock_prices[self.symbol] = 0
-            
-            # Process the bankruptcy
-            announcement_data = await StockManager.handle_bankruptcy(self.symbol, bot)
+            # Process the bankruptcy under the market lock so it can't race a price update
+            announcement_data = await StockManager.delist_stock(self.symbol, bot)
             
             # Create response
             response_embed = discord.Embed(
@@ -530,7 +527,7 @@ async def admin_create_stock(ctx, symbol, initial_price=None, user=None, bot=Non
     # Add the stock
     StockManager.stock_symbols.append(symbol)
     StockManager.stock_prices[symbol] = round(price, 2)
-    StockManager.price_history[symbol] = [round(price, 2)]
+    StockManager.price_history[symbol] = StockManager.new_history([round(price, 2)])
     
     # Associate with user if provided
     if user_id:
@@ -609,7 +606,7 @@ async def admin_remove_stock(ctx, symbol, bot=None):
             
             try:
                 # Process the removal similar to bankruptcy but without the 0 price
-                announcement_data = await StockManager.handle_bankruptcy(self.symbol, bot)
+                announcement_data = await StockManager.delist_stock(self.symbol, bot)
                 
                 # Create response
                 response_embed = discord.Embed(
@@ -661,7 +658,7 @@ async def admin_market_condition(ctx, condition=None, bot=None):
     if ctx.author.id not in config.ADMIN_USER_IDS:
         return "❌ You don't have permission to use admin commands."
 
-    valid_conditions = ["bear", "bull", "volatile", "stable", "crash", "superbull"]
+    valid_conditions = list(MARKET_CONDITIONS)
     
     # If no condition specified, just report current status
     if not condition:
@@ -691,40 +688,10 @@ async def admin_market_condition(ctx, condition=None, bot=None):
     if condition not in valid_conditions:
         return f"⚠️ Invalid market condition. Valid options are: {', '.join(valid_conditions)}"
     
-    # Define condition properties
-    condition_properties = {
-        "bear": {
-            "min_change": random.uniform(-5, -1),
-            "max_change": random.uniform(0, 2),
-        },
-        "bull": {
-            "min_change": random.uniform(-.5, 1),
-            "max_change": random.uniform(2, 5.5),
-        },
-        "volatile": {
-            "min_change": random.uniform(-8, -3),
-            "max_change": random.uniform(3, 8),
-        },
-        "stable": {
-            "min_change": random.uniform(-4, -1),
-            "max_change": random.uniform(1, 4),
-        },
-        "crash": {
-            "min_change": random.uniform(-12, -8),
-            "max_change": random.uniform(-8, -4),
-        },
-        "superbull":{
-            "min_change": random.uniform(0, 1),
-            "max_change": random.uniform(4, 8),
-        }
-        
-    }
-    
     # Update market condition
     old_condition = StockManager.market_condition
     StockManager.market_condition = condition
-    StockManager.current_min_change = condition_properties[condition]["min_change"]
-    StockManager.current_max_change = condition_properties[condition]["max_change"]
+    StockManager.current_min_change, StockManager.current_max_change = StockManager.draw_condition_bounds(condition)
     StockManager.last_condition_change = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
     
     # Save changes
@@ -806,7 +773,7 @@ async def admin_award_all(ctx, amount, bot=None):
         return "⚠️ Invalid amount. Please enter a valid number."
 
     # Load all user data
-    data = DataManager.load_data(config.USER_DATA_FILE)
+    data = DataManager.get_cached(config.USER_DATA_FILE)
     
     # Keep track of how many users were updated
     updated_count = 0
@@ -817,7 +784,7 @@ async def admin_award_all(ctx, amount, bot=None):
         updated_count += 1
     
     # Save changes
-    DataManager.save_data(config.USER_DATA_FILE, data)
+    DataManager.mark_dirty(config.USER_DATA_FILE)
     
     # Create response embed
     embed = discord.Embed(
@@ -887,21 +854,11 @@ async def admin_force_update(ctx, bot=None):
                     
                     # Add information about affected users
                     if affected_users:
-                        user_list = []
-                        for user_id, shares in affected_users:
-                            try:
-                                user = await bot.fetch_user(int(user_id))
-                                user_list.append(f"{user.mention}: Lost {shares} shares")
-                            except:
-                                user_list.append(f"User {user_id}: Lost {shares} shares")
-                        
-                        if user_list:
-                            embed.add_field(
-                                name="Affected Investors",
-                                value="\n".join(user_list[:10]) + 
-                                    (f"\n... and {len(user_list) - 10} more" if len(user_list) > 10 else ""),
-                                inline=False
-                            )
+                        embed.add_field(
+                            name="Affected Investors",
+                            value=await StockManager.format_affected_investors(bot, affected_users),
+                            inline=False
+                        )
                     
                     embed.set_footer(text="All shares have been removed and the stock has been delisted.")
                     
@@ -65,11 +65,10 @@ def daily(ctx):
     creator_dividend = dividend_results["creators"].get(user_id, 0)
     total_dividend = shareholder_dividend + creator_dividend
 
-    total_reward = total_dividend + reward
-
-    data[user_id]["balance"] += total_reward
+    # Dividends were already credited to the shared user data above
+    data[user_id]["balance"] += reward
     data[user_id]["last_daily"] = today
-    DataManager.save_data(config.USER_DATA_FILE, data)
+    DataManager.mark_dirty(config.USER_DATA_FILE)
     
     # Create response embed
     embed = discord.Embed(
@@ -264,7 +263,7 @@ async def rebrand_stock(ctx, new_symbol, bot=None):
                 StockManager.user_to_ticker[self.user_id] = self.new_symbol
                 
                 # Update all user inventories that hold this stock
-                user_data = DataManager.load_data(config.USER_DATA_FILE)
+                user_data = DataManager.get_cached(config.USER_DATA_FILE)
                 updated_users = 0
                 
                 for uid, data in user_data.items():
@@ -276,7 +275,7 @@ async def rebrand_stock(ctx, new_symbol, bot=None):
                         updated_users += 1
                 
                 # Save user data
-                DataManager.save_data(config.USER_DATA_FILE, user_data)
+                DataManager.mark_dirty(config.USER_DATA_FILE)
                 
                 # Save stock changes
                 StockManager.save_stocks()
@@ -455,7 +454,7 @@ def dividend_status(ctx):
     DataManager.ensure_user(user_id)
     
     # Load user data
-    data = DataManager.load_data(config.USER_DATA_FILE)
+    data = DataManager.get_cached(config.USER_DATA_FILE)
     
     # Get stocks created by user
     owned_stock_symbol = None
@@ -66,10 +66,16 @@ IPO_COST = 1000
 # Update settings
 STOCK_UPDATE_INTERVAL = 45  # minutes
 LEADERBOARD_UPDATE_INTERVAL = 15  # minutes
+LEADERBOARD_MAX_ENTRIES = 50  # rows shown per leaderboard (embeds cap at 4096 chars)
+STOCK_FLUSH_INTERVAL = 5  # seconds between writes of changed stock data
+CHART_UPDATE_DELAY = 1  # seconds to gather trades before redrawing a chart
+DATA_SAVE_INTERVAL = 0.5  # seconds to gather data changes into one write
+MAX_PENDING_WRITES = 100  # queued changes that trigger a write right away
 STOCK_PRICE_MIN_CHANGE = -3
 STOCK_PRICE_MAX_CHANGE = 3
 NEW_STOCK_MIN_PRICE = 80
 NEW_STOCK_MAX_PRICE = 90
+PRICE_HISTORY_LEN = 175  # price updates kept per stock
 STOCK_BUY_MIN_CHANGE = 3
 STOCK_BUY_MAX_CHANGE = 9
 STOCK_SELL_MIN_CHANGE = 3
@@ -3,17 +3,42 @@ Data management module for Stock Exchange Discord Bot
 Handles loading and saving data from JSON files
 """
 import os
+import copy
 import json
+import asyncio
 import logging
-from typing import Dict, Any, Union
+from typing import Dict, Any, Optional, Tuple, Union
 
 import config
 
 logger = logging.getLogger('stock_exchange.data')
 
+def _copy_json(data: Any) -> Any:
+    """Copy JSON-shaped data (dicts, lists and scalars), much faster than deepcopy"""
+    if type(data) is dict:
+        return {key: _copy_json(value) for key, value in data.items()}
+    if type(data) is list:
+        return [_copy_json(value) for value in data]
+    return data
+
 class DataManager:
     """Class to handle all data loading and saving operations"""
     
+    # Documents kept in memory after their first get_cached(), keyed by filename
+    _cache: Dict[str, Any] = {}
+    
+    # Last parsed contents of each file, keyed by filename, with the file's
+    # modification time and size so unchanged files aren't parsed again
+    _mtime_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+    
+    # Background writer state: data waiting to be written, keyed by filename
+    _pending: Dict[str, Any] = {}
+    _dirty = set()
+    _save_queue: Optional[asyncio.Queue] = None
+    _saver_task: Optional[asyncio.Task] = None
+    _flush_now: Optional[asyncio.Event] = None
+    _pending_writes = 0
+    
     @staticmethod
     def ensure_files_exist() -> None:
         """Ensure all required data files exist"""
@@ -41,35 +66,199 @@ class DataManager:
             logger.info(f"Created empty {config.STOCK_MESSAGES_FILE}")
 
     
-    @staticmethod
-    def load_data(filename: str) -> Dict:
-        """Load data from a JSON file"""
+    @classmethod
+    def load_data(cls, filename: str) -> Dict:
+        """Load a private copy of the data in a JSON file"""
+        return _copy_json(cls._read(filename))
+    
+    @classmethod
+    def _read(cls, filename: str) -> Any:
+        """Get the newest contents of a file without copying them"""
+        # The in-memory copy and any queued write are newer than what is on disk
+        if filename in cls._cache:
+            return cls._cache[filename]
+        if filename in cls._pending:
+            return cls._pending[filename]
+        
         try:
-            with open(filename, "r") as f:
-                return json.load(f)
+            stat = os.stat(filename)
+            version = (stat.st_mtime_ns, stat.st_size)
+            cached = cls._mtime_cache.get(filename)
+            if cached is None or cached[0] != version:
+                with open(filename, "r") as f:
+                    cached = cls._mtime_cache[filename] = (version, json.load(f))
+            return cached[1]
         except (json.JSONDecodeError, FileNotFoundError) as e:
             logger.error(f"Error loading {filename}: {e}")
             return {}
     
     @staticmethod
-    def save_data(filename: str, data: Dict) -> None:
+    def serialize(data: Any) -> str:
+        """Serialize data to compact JSON"""
+        return json.dumps(data, separators=(",", ":"))
+    
+    @staticmethod
+    def write_payload(filename: str, payload: str, sync: bool = False) -> None:
+        """
+        Atomically write an already serialized payload to a file
+        
+        The payload is encoded once and handed to the OS in a single write
+        (looping only on a short write) to a temporary sibling file and then
+        swapped into place, so a crash mid-write never leaves a truncated
+        file behind. With sync, the file is also fsynced before the swap;
+        that blocks, so only worker threads and shutdown ask for it.
+        """
+        tmp_filename = filename + ".tmp"
+        view = memoryview(payload.encode("utf-8"))
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        fd = os.open(tmp_filename, flags, 0o644)
+        try:
+            while view:
+                view = view[os.write(fd, view):]
+            if sync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_filename, filename)
+    
+    @classmethod
+    def write_json(cls, filename: str, data: Any, sync: bool = False) -> None:
+        """Atomically write data to a JSON file"""
+        cls.write_payload(filename, cls.serialize(data), sync)
+        # The caller still owns data, so don't keep it; the next load reparses
+        cls._mtime_cache.pop(filename, None)
+    
+    @classmethod
+    def get_cached(cls, filename: str) -> Dict:
+        """
+        Get the shared in-memory copy of a JSON file, loading it on first use
+        
+        Changes made to the returned data are persisted with mark_dirty().
+        """
+        data = cls._cache.get(filename)
+        if data is None:
+            data = cls._cache[filename] = _copy_json(cls._read(filename))
+        return data
+    
+    @classmethod
+    def mark_dirty(cls, filename: str) -> None:
+        """Schedule the cached copy of a file to be written by the background writer"""
+        cls.queue_save(filename, cls._cache[filename])
+    
+    @classmethod
+    def save_data(cls, filename: str, data: Dict) -> None:
         """Save data to a JSON file"""
+        # Once the background writer is running it does the write, so the
+        # event loop never waits on the disk (and never races the writer)
         try:
-            with open(filename, "w") as f:
-                json.dump(data, f, indent=0)
-            logger.debug(f"Data saved to {filename}")
+            cls.queue_save(filename, data)
         except Exception as e:
             logger.error(f"Error saving to {filename}: {e}")
     
+    @classmethod
+    def queue_save(cls, filename: str, data: Dict) -> None:
+        """
+        Schedule data to be written by the background writer
+        
+        Requests made within config.DATA_SAVE_INTERVAL of each other are
+        coalesced into a single write of the latest data, or sooner once
+        config.MAX_PENDING_WRITES have queued up. Falls back to a synchronous
+        save if the writer has not been started.
+        """
+        # Data other than the shared copy is copied, so neither the cache nor
+        # the writer holds on to a dict the caller still owns
+        cached = cls._cache.get(filename)
+        if data is not cached:
+            data = _copy_json(data)
+            if cached is not None:
+                cls._cache[filename] = data
+        
+        if cls._save_queue is None:
+            cls.write_json(filename, data)
+            return
+        
+        cls._pending[filename] = data
+        cls._dirty.add(filename)
+        cls._save_queue.put_nowait(filename)
+        
+        cls._pending_writes += 1
+        if cls._pending_writes >= config.MAX_PENDING_WRITES:
+            cls._flush_now.set()
+    
+    @classmethod
+    def start_saver(cls) -> None:
+        """Start the background writer task if it is not already running"""
+        if cls._saver_task is not None and not cls._saver_task.done():
+            return
+        
+        cls._save_queue = asyncio.Queue()
+        cls._flush_now = asyncio.Event()
+        
+        # Requeue anything left waiting (or mid-write) when the last writer stopped
+        for filename in cls._pending:
+            cls._dirty.add(filename)
+            cls._save_queue.put_nowait(filename)
+        
+        cls._saver_task = asyncio.create_task(cls._run_saver())
+        logger.info("Started background data writer")
+    
+    @classmethod
+    async def _run_saver(cls) -> None:
+        """Write queued data to disk, coalescing back-to-back requests"""
+        while True:
+            filenames = {await cls._save_queue.get()}
+            
+            # Let more changes pile up so they share the write, unless a
+            # burst has already queued enough of them
+            try:
+                await asyncio.wait_for(cls._flush_now.wait(), config.DATA_SAVE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            cls._flush_now.clear()
+            cls._pending_writes = 0
+            
+            while not cls._save_queue.empty():
+                filenames.add(cls._save_queue.get_nowait())
+            
+            for filename in filenames:
+                if filename not in cls._dirty:
+                    continue
+                cls._dirty.discard(filename)
+                
+                try:
+                    # Serialize on the loop so the data can't change mid-dump
+                    payload = cls.serialize(cls._pending[filename])
+                    await asyncio.to_thread(cls.write_payload, filename, payload, True)
+                    logger.debug(f"Data saved to {filename}")
+                except Exception as e:
+                    logger.error(f"Error saving to {filename}: {e}")
+                
+                # Keep serving the pending copy if it changed during the write
+                if filename not in cls._dirty:
+                    cls._pending.pop(filename, None)
+    
+    @classmethod
+    def flush(cls) -> None:
+        """Synchronously write out any data still waiting on the background writer"""
+        # Includes writes that were in flight if the writer was cancelled
+        for filename in list(cls._pending):
+            try:
+                cls.write_json(filename, cls._pending[filename], sync=True)
+                logger.info(f"Flushed pending data to {filename}")
+            except Exception as e:
+                logger.error(f"Error flushing {filename}: {e}")
+        cls._dirty.clear()
+        cls._pending.clear()
+    
     @staticmethod
     def ensure_user(user_id: Union[int, str]) -> Dict:
-        """Ensure a user exists in the data and return the updated data"""
-        data = DataManager.load_data(config.USER_DATA_FILE)
+        """Ensure a user exists in the data and return the shared user data"""
+        data = DataManager.get_cached(config.USER_DATA_FILE)
         uid = str(user_id)
         
         if uid not in data:
-            data[uid] = config.DEFAULT_USER_DATA.copy()
-            DataManager.save_data(config.USER_DATA_FILE, data)
+            data[uid] = copy.deepcopy(config.DEFAULT_USER_DATA)
+            DataManager.mark_dirty(config.USER_DATA_FILE)
             logger.info(f"Created new user data for {uid}")
         
         return data
\ No newline at end of file
@@ -84,7 +84,7 @@ class DecayManager:
             Dictionary mapping stock symbols to their popularity score
         """
         # Load user data
-        user_data = DataManager.load_data(config.USER_DATA_FILE)
+        user_data = DataManager.get_cached(config.USER_DATA_FILE)
         
         # Count shareholders for each stock
         stock_holders = {symbol: 0 for symbol in StockManager.get_all_symbols()}
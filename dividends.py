@@ -40,7 +40,7 @@ class DividendManager:
             Dictionary mapping user IDs to dividend amounts
         """
         # Load all user data
-        user_data = DataManager.load_data(config.USER_DATA_FILE)
+        user_data = DataManager.get_cached(config.USER_DATA_FILE)
         
         # Track dividends for each user
         dividends = {}
@@ -185,7 +185,7 @@ class DividendManager:
             - 'creators': Maps user IDs to dividend amounts for stock creators
         """
         # Load all user data
-        user_data = DataManager.load_data(config.USER_DATA_FILE)
+        user_data = DataManager.get_cached(config.USER_DATA_FILE)
         
         # Today's date in EST
         utc_now = datetime.now(pytz.utc)
@@ -231,12 +231,12 @@ class DividendManager:
                 UserManager.update_balance(user_id, total_dividend)
                 
                 # Record last dividend date
-                data = DataManager.load_data(config.USER_DATA_FILE)
+                data = DataManager.get_cached(config.USER_DATA_FILE)
                 if "last_dividend" not in data[user_id]:
                     data[user_id]["last_dividend"] = {}
                 data[user_id]["last_dividend"]["date"] = today
                 data[user_id]["last_dividend"]["amount"] = total_dividend
-                DataManager.save_data(config.USER_DATA_FILE, data)
+                DataManager.mark_dirty(config.USER_DATA_FILE)
                 
                 logger.info(f"Paid ${total_dividend:.2f} in daily dividends to user {user_id}")
         
@@ -27,6 +27,7 @@ class EventHandlers:
     def __init__(self, bot):
         self.bot = bot
         self.stock_update_task = None
+        self._stocks_loaded = False  # Stock data and message IDs are only read on the first ready
     
     async def on_ready(self):
         """Called when the bot is ready"""
@@ -34,8 +35,17 @@ class EventHandlers:
         
         # Initialize data and stock systems
         DataManager.ensure_files_exist()
-        StockManager.load_stocks()
-        StockManager.load_stock_messages()
+        DataManager.start_saver()
+        UserManager.migrate_users()
+        StockManager.cache_channels(self.bot)
+        
+        # on_ready fires again after a reconnect that couldn't resume; by then
+        # memory holds changes the periodic flush may not have written yet
+        if not self._stocks_loaded:
+            StockManager.load_stocks()
+            StockManager.load_stock_messages()
+            self._stocks_loaded = True
+        StockManager.start_flush_loop()
         
         # Initialize leaderboard system
         from leaderboard_manager import LeaderboardManager
@@ -106,22 +116,19 @@ class EventHandlers:
                 data[user_id]["earned"] += points_to_add
                 logger.debug(f"Awarded {points_to_add} to user {user_id} for message")
             
-            DataManager.save_data(config.USER_DATA_FILE, data)
+            DataManager.mark_dirty(config.USER_DATA_FILE)
     
     async def on_reaction_add(self, reaction, user):
         """Called when a reaction is added to a message"""
         if user.bot or reaction.message.channel.id not in config.ACTIVE_CHANNEL_IDS:
             return
         
-        data = DataManager.load_data(config.USER_DATA_FILE)
         message_author_id = str(reaction.message.author.id)
         reactor_id = str(user.id)
         
         # Ensure users exist
-        if message_author_id not in data:
-            data[message_author_id] = DataManager.ensure_user(message_author_id)[message_author_id]
-        if reactor_id not in data:
-            data[reactor_id] = DataManager.ensure_user(reactor_id)[reactor_id]
+        DataManager.ensure_user(message_author_id)
+        data = DataManager.ensure_user(reactor_id)
         
         # Award balance
         if message_author_id != reactor_id:  # Prevent self-rewarding
@@ -139,7 +146,7 @@ class EventHandlers:
             data[reactor_id]["balance"] += reactor_reward
             logger.debug(f"Awarded {reactor_reward} to reactor {reactor_id}")
         
-        DataManager.save_data(config.USER_DATA_FILE, data)
+        DataManager.mark_dirty(config.USER_DATA_FILE)
     
     async def on_command_error(self, ctx, error):
         """Global error handler for commands"""
@@ -153,6 +160,10 @@ class EventHandlers:
             logger.error(f"Command error: {error}")
             await ctx.send(f"❌ An error occurred: {error}")
     
+    async def on_guild_channel_delete(self, channel):
+        """Called when a channel is deleted"""
+        StockManager.invalidate_channel(channel.id)
+    
     @tasks.loop(minutes=config.STOCK_UPDATE_INTERVAL)
     async def update_stock_prices(self):
         """Periodically update stock prices and edit existing messages"""
@@ -197,7 +208,7 @@ class EventHandlers:
         # Remove missing messages from original dictionary
         for symbol in missing_messages:
             if symbol in StockManager.stock_messages:
-                del StockManager.stock_messages[symbol]
+                ChartView.forget_message(StockManager.stock_messages.pop(symbol))
         
         # If any messages are missing, repost them
         if missing_messages:
@@ -218,7 +229,7 @@ class EventHandlers:
             est_now = utc_now.astimezone(eastern)
             today = est_now.strftime("%Y-%m-%d")
             
-            user_data = DataManager.load_data(config.USER_DATA_FILE)
+            user_data = DataManager.get_cached(config.USER_DATA_FILE)
             users_to_process = []
             
             for user_id, data in user_data.items():
@@ -305,21 +316,11 @@ class EventHandlers:
             
             # Add information about affected users
             if affected_users:
-                user_list = []
-                for user_id, shares in affected_users:
-                    try:
-                        user = await self.bot.fetch_user(int(user_id))
-                        user_list.append(f"{user.mention}: Lost {shares} shares")
-                    except:
-                        user_list.append(f"User {user_id}: Lost {shares} shares")
-                
-                if user_list:
-                    embed.add_field(
-                        name="Affected Investors",
-                        value="\n".join(user_list[:10]) + 
-                            (f"\n... and {len(user_list) - 10} more" if len(user_list) > 10 else ""),
-                        inline=False
-                    )
+                embed.add_field(
+                    name="Affected Investors",
+                    value=await StockManager.format_affected_investors(self.bot, affected_users),
+                    inline=False
+                )
             
             # Add footer
             embed.set_footer(text="All shares have been removed and the stock has been delisted.")
@@ -394,7 +395,10 @@ class EventHandlers:
             
             # Create chart & embed
             view = ChartView(symbol)
-            file, embed = await view.get_embed()
+            result = await view.get_embed()
+            if result is None:
+                continue
+            file, embed = result
             
             # Send message
             try:
@@ -430,7 +434,10 @@ class EventHandlers:
             
             # Create chart & embed
             view = ChartView(symbol)
-            file, embed = await view.get_embed()
+            result = await view.get_embed()
+            if result is None:
+                continue
+            file, embed = result
             
             # Send message
             try:
@@ -456,5 +463,6 @@ def setup(bot):
     bot.event(events.on_message)
     bot.event(events.on_reaction_add)
     bot.event(events.on_command_error)
+    bot.event(events.on_guild_channel_delete)
     
     return events
\ No newline at end of file
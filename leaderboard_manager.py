@@ -11,6 +11,7 @@ import discord
 from discord.ext import tasks
 
 import config
+from data_manager import DataManager
 from ui_components import BalanceLeaderboardView, StockLeaderboardView
 
 logger = logging.getLogger('stock_exchange.leaderboard')
@@ -65,8 +66,7 @@ class LeaderboardManager:
         }
         
         try:
-            with open(cls.LEADERBOARD_FILE, "w") as f:
-                json.dump(data, f, indent=0)
+            DataManager.write_json(cls.LEADERBOARD_FILE, data)
             logger.info("Saved leaderboard message IDs")
         except Exception as e:
             logger.error(f"Error saving leaderboard message IDs: {e}")
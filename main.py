@@ -8,6 +8,8 @@ import discord
 from discord.ext import commands
 
 import config
+from data_manager import DataManager
+from stock_manager import StockManager
 from commands import setup as setup_commands
 from event_handlers import setup as setup_events
 
@@ -65,6 +67,10 @@ def main():
         logger.info("Bot shutdown initiated by user.")
     except Exception as e:
         logger.error(f"Error starting bot: {e}", exc_info=True)
+    finally:
+        # Write out anything the background writers didn't get to
+        StockManager.flush_stocks()
+        DataManager.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,14 +5,19 @@ Handles stock data, market conditions, and price updates
 import discord
 import json
 import random
+import asyncio
 import logging
+import time
 import pytz
+from collections import Counter, OrderedDict, deque
+from itertools import accumulate
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Tuple, Optional, Union
 from io import BytesIO
 
-import matplotlib.pyplot as plt
 import matplotlib.image as mpimg
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import matplotlib.dates as mdates
 from matplotlib.ticker import MaxNLocator
 
@@ -20,6 +25,46 @@ import config
 
 logger = logging.getLogger('stock_exchange.stocks')
 
+# Sentinel for dict.pop() lookups where None could be a real value
+_MISSING = object()
+
+# Timezone used for same-day trade checks, resolved once
+_EASTERN = pytz.timezone("America/New_York")
+
+def _trend_direction(upward_moves: int, downward_moves: int) -> str:
+    """Classify a trend from its up and down move counts"""
+    if upward_moves > downward_moves * 1.5:
+        return "strong upward"
+    elif upward_moves > downward_moves:
+        return "upward"
+    elif downward_moves > upward_moves * 1.5:
+        return "strong downward"
+    elif downward_moves > upward_moves:
+        return "downward"
+    return "neutral"
+
+# Possible market conditions: name -> (weight, min_change range, max_change range)
+MARKET_CONDITIONS = {
+    "bear": (0.2, (-5, -1), (0, 2)),
+    "bull": (0.2, (-.5, 1), (2, 5.5)),
+    "superbull": (0.02, (0, 1), (4, 8)),
+    "volatile": (0.2, (-8, -3), (3, 8)),
+    "stable": (0.35, (-4, -1), (1, 4)),
+    "crash": (0.03, (-12, -8), (-8, -4)),
+}
+_CONDITION_NAMES = tuple(MARKET_CONDITIONS)
+_CONDITION_CUM_WEIGHTS = tuple(accumulate(weight for weight, _, _ in MARKET_CONDITIONS.values()))
+
+# Trend over the last 10 prices (9 moves), indexed by the number of up moves
+_TREND_WINDOW = 10
+_TREND_BY_UPWARD_MOVES = tuple(
+    _trend_direction(up, _TREND_WINDOW - 1 - up) for up in range(_TREND_WINDOW)
+)
+
+# Discord limits per message: embed count and combined embed text length
+_MAX_EMBEDS_PER_MESSAGE = 10
+_MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
 class StockManager:
     """Class to handle all stock market simulation logic"""
     
@@ -36,10 +81,40 @@ class StockManager:
     market_condition = "stable"
     last_condition_change = None
     
+    # Epoch seconds parsed from last_condition_change, and the string it came from
+    _last_change_epoch = None
+    _last_change_parsed = None
+    
     # File paths
     STOCKS_FILE = config.STOCKS_FILE
     STOCK_MESSAGES_FILE = config.STOCK_MESSAGES_FILE
     
+    # Recently fetched Discord users (LRU) for bankruptcy announcements
+    _user_cache = OrderedDict()
+    USER_CACHE_SIZE = 256
+    
+    # Serializes price updates with bankruptcy handling
+    _market_lock = asyncio.Lock()
+    
+    # Pending stock data changes, written by the periodic flush
+    _dirty = False
+    _messages_dirty = False
+    _flush_task = None
+    _saving = False
+    
+    # Channels resolved once and reused (cleared if the channel is deleted)
+    _stock_channel = None
+    _terminal_channel = None
+    
+    # Formatted market summary timestamp, reused within the same second
+    _last_ts_sec = 0
+    _last_ts_str = ""
+    
+    # Rendered chart PNGs keyed by symbol, with the history they were drawn from
+    _chart_cache = {}
+    _logo = None
+    _logo_loaded = False
+    
     @classmethod
     def initialize(cls) -> bool:
         """Initialize the stock market system"""
@@ -67,7 +142,10 @@ class StockManager:
             required_fields = ["STOCK_PRICES", "PRICE_HISTORY"]
             if all(field in data for field in required_fields):
                 cls.stock_prices = data["STOCK_PRICES"]
-                cls.price_history = data["PRICE_HISTORY"]
+                cls.price_history = {
+                    symbol: cls.new_history(history)
+                    for symbol, history in data["PRICE_HISTORY"].items()
+                }
                 
                 # Load symbols and mappings if available in new format
                 if "STOCK_SYMBOLS" in data:
@@ -111,11 +189,11 @@ class StockManager:
         cls._generate_new_stocks()
     
     @classmethod
-    def save_stocks(cls) -> None:
-        """Save current stock data to file"""
-        data = {
+    def _stock_data(cls) -> Dict[str, Any]:
+        """Build the stock data document that is saved to file"""
+        return {
             "STOCK_PRICES": cls.stock_prices,
-            "PRICE_HISTORY": cls.price_history,
+            "PRICE_HISTORY": {symbol: list(history) for symbol, history in cls.price_history.items()},
             "STOCK_SYMBOLS": cls.stock_symbols,
             "USER_TO_TICKER": cls.user_to_ticker,
             "MARKET_CONDITION": cls.market_condition,
@@ -123,13 +201,83 @@ class StockManager:
             "CURRENT_MAX_CHANGE": cls.current_max_change,
             "LAST_CONDITION_CHANGE": cls.last_condition_change
         }
+    
+    @classmethod
+    def save_stocks(cls) -> None:
+        """Save current stock data to file"""
+        if cls._saving:
+            # A background write is in flight; let the next flush write this
+            # rather than racing it for the file
+            cls._dirty = True
+            return
+        
+        from data_manager import DataManager
+        try:
+            DataManager.write_json(cls.STOCKS_FILE, cls._stock_data())
+            cls._dirty = False
+            logger.debug("💾 Stock data saved successfully.")
+        except Exception as e:
+            logger.error(f"Error saving stock data: {e}")
+    
+    @classmethod
+    async def save_stocks_async(cls) -> None:
+        """Save current stock data to file without blocking the event loop"""
+        from data_manager import DataManager
         
+        # Serialize on the loop so the data can't change mid-dump; only the
+        # disk write runs in a worker thread
+        payload = DataManager.serialize(cls._stock_data())
+        cls._dirty = False
+        cls._saving = True
         try:
-            with open(cls.STOCKS_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=0)
+            await asyncio.to_thread(DataManager.write_payload, cls.STOCKS_FILE, payload, True)
             logger.debug("💾 Stock data saved successfully.")
         except Exception as e:
+            cls._dirty = True
             logger.error(f"Error saving stock data: {e}")
+        finally:
+            cls._saving = False
+    
+    @classmethod
+    def mark_dirty(cls) -> None:
+        """Flag stock data as changed so the next periodic flush writes it"""
+        if cls._flush_task is None:
+            # No flush loop running (e.g. before the bot is ready), save now
+            cls.save_stocks()
+            return
+        cls._dirty = True
+    
+    @classmethod
+    def mark_messages_dirty(cls) -> None:
+        """Flag stock message IDs as changed so the next periodic flush writes them"""
+        if cls._flush_task is None:
+            cls.save_stock_messages()
+            return
+        cls._messages_dirty = True
+    
+    @classmethod
+    def flush_stocks(cls) -> None:
+        """Write stock data and message IDs if they have changed since the last save"""
+        if cls._dirty:
+            cls.save_stocks()
+        if cls._messages_dirty:
+            cls.save_stock_messages()
+    
+    @classmethod
+    def start_flush_loop(cls) -> None:
+        """Start the periodic stock data flush if it is not already running"""
+        if cls._flush_task is None or cls._flush_task.done():
+            cls._flush_task = asyncio.create_task(cls._flush_loop())
+    
+    @classmethod
+    async def _flush_loop(cls) -> None:
+        """Write changed stock data and message IDs at most once per flush interval"""
+        while True:
+            await asyncio.sleep(config.STOCK_FLUSH_INTERVAL)
+            if cls._dirty:
+                await cls.save_stocks_async()
+            if cls._messages_dirty:
+                cls.save_stock_messages()
     
     @classmethod
     def _generate_new_stocks(cls) -> None:
@@ -148,7 +296,7 @@ class StockManager:
         
         # Initialize price history with starting prices
         cls.price_history = {
-            symbol: [cls.stock_prices[symbol]] 
+            symbol: cls.new_history([cls.stock_prices[symbol]])
             for symbol in cls.stock_symbols
         }
         
@@ -168,15 +316,16 @@ class StockManager:
     def load_stock_messages(cls) -> None:
         """Load message IDs for stock charts"""
         try:
-            if open(cls.STOCK_MESSAGES_FILE, "a").close() or True:  # Create file if it doesn't exist
-                with open(cls.STOCK_MESSAGES_FILE, "r", encoding="utf-8") as f:
-                    try:
-                        cls.stock_messages = json.load(f)
-                        logger.info(f"Loaded {len(cls.stock_messages)} stock message IDs")
-                    except json.JSONDecodeError:
-                        # File exists but is invalid JSON
-                        cls.stock_messages = {}
-                        logger.warning("Stock messages file corrupted. Reset to empty.")
+            with open(cls.STOCK_MESSAGES_FILE, "r", encoding="utf-8") as f:
+                cls.stock_messages = json.load(f)
+            logger.info(f"Loaded {len(cls.stock_messages)} stock message IDs")
+        except FileNotFoundError:
+            # Nothing saved yet; the file is created on the first save
+            cls.stock_messages = {}
+        except json.JSONDecodeError:
+            # File exists but is invalid JSON
+            cls.stock_messages = {}
+            logger.warning("Stock messages file corrupted. Reset to empty.")
         except Exception as e:
             logger.error(f"Error loading stock messages: {e}")
             cls.stock_messages = {}
@@ -184,13 +333,47 @@ class StockManager:
     @classmethod
     def save_stock_messages(cls) -> None:
         """Save message IDs for stock charts"""
+        from data_manager import DataManager
         try:
-            with open(cls.STOCK_MESSAGES_FILE, "w", encoding="utf-8") as f:
-                json.dump(cls.stock_messages, f, indent=0)
+            DataManager.write_json(cls.STOCK_MESSAGES_FILE, cls.stock_messages)
+            cls._messages_dirty = False
             logger.debug("Stock message IDs saved.")
         except Exception as e:
             logger.error(f"Error saving stock message IDs: {e}")
 
+    @classmethod
+    def cache_channels(cls, bot) -> None:
+        """Resolve and cache the stock and terminal channels"""
+        cls._stock_channel = bot.get_channel(config.STOCK_CHANNEL_ID)
+        cls._terminal_channel = bot.get_channel(config.TERMINAL_CHANNEL_ID)
+    
+    @classmethod
+    def get_stock_channel(cls, bot):
+        """Get the stock channel, resolving it if not cached yet"""
+        if cls._stock_channel is None:
+            cls._stock_channel = bot.get_channel(config.STOCK_CHANNEL_ID)
+        return cls._stock_channel
+    
+    @classmethod
+    def get_terminal_channel(cls, bot):
+        """Get the terminal channel, resolving it if not cached yet"""
+        if cls._terminal_channel is None:
+            cls._terminal_channel = bot.get_channel(config.TERMINAL_CHANNEL_ID)
+        return cls._terminal_channel
+    
+    @classmethod
+    def invalidate_channel(cls, channel_id: int) -> None:
+        """Drop a cached channel that no longer exists"""
+        if channel_id == config.STOCK_CHANNEL_ID:
+            cls._stock_channel = None
+        elif channel_id == config.TERMINAL_CHANNEL_ID:
+            cls._terminal_channel = None
+    
+    @staticmethod
+    def new_history(prices=()) -> deque:
+        """Create a price history that keeps only the most recent updates"""
+        return deque(prices, maxlen=config.PRICE_HISTORY_LEN)
+    
     @classmethod
     def get_all_symbols(cls) -> list:
         return cls.stock_symbols
@@ -199,86 +382,45 @@ class StockManager:
     def get_user_stock(cls, user_id) -> str:
         return cls.user_to_ticker.get(str(user_id))
     
+    @staticmethod
+    def draw_condition_bounds(condition: str) -> Tuple[float, float]:
+        """Draw the min and max price change for a market condition"""
+        _, min_range, max_range = MARKET_CONDITIONS[condition]
+        return random.uniform(*min_range), random.uniform(*max_range)
+    
     @classmethod
     def check_market_condition(cls) -> None:
         """
         Check and potentially update market condition based on 9-hour schedule.
         """
-        now = datetime.now(timezone.utc)
-        current_time = now.strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Format last condition change time if it exists
+        # Check the time since the last condition change if there was one
         if cls.last_condition_change:
-            try:
-                # Try to parse the stored datetime string
-                last_change_time = datetime.strptime(cls.last_condition_change, "%Y-%m-%d %H:%M:%S")
-                # Add timezone info
-                last_change_time = last_change_time.replace(tzinfo=timezone.utc)
-                
-                # Check if 6 hours have passed
-                time_diff = now - last_change_time
-                hours_passed = time_diff.total_seconds() / 3600
-                
-                # If less than 6 hours have passed, don't update
-                if hours_passed < 9:
-                    return
-                    
-            except ValueError:
-                # If there's an error parsing the date, force an update
-                logger.warning("Could not parse last condition change time. Forcing market update.")
-        
-        # Define possible market conditions with their properties
-        conditions = [
-            {
-                "name": "bear", 
-                "weight": 0.2,
-                "min_change": random.uniform(-5, -1),
-                "max_change": random.uniform(0, 2),
-            },
-            {
-                "name": "bull", 
-                "weight": 0.2,
-                "min_change": random.uniform(-.5, 1),
-                "max_change": random.uniform(2, 5.5),
-            },
-            {
-                "name": "superbull", 
-                "weight": 0.02,
-                "min_change": random.uniform(0, 1),
-                "max_change": random.uniform(4, 8),
-            },
-            {
-                "name": "volatile", 
-                "weight": 0.2,
-                "min_change": random.uniform(-8, -3),
-                "max_change": random.uniform(3, 8),
-            },
-            {
-                "name": "stable", 
-                "weight": 0.35,  
-                "min_change": random.uniform(-4, -1),
-                "max_change": random.uniform(1, 4),
-            },
-            {
-                "name": "crash", 
-                "weight": 0.03,  
-                "min_change": random.uniform(-12, -8),
-                "max_change": random.uniform(-8, -4),
-            }
-        ]
+            # Only parse the stored datetime string when it has changed
+            if cls.last_condition_change != cls._last_change_parsed:
+                try:
+                    last_change_time = datetime.strptime(cls.last_condition_change, "%Y-%m-%d %H:%M:%S")
+                    cls._last_change_epoch = last_change_time.replace(tzinfo=timezone.utc).timestamp()
+                except ValueError:
+                    # If there's an error parsing the date, force an update
+                    cls._last_change_epoch = None
+                    logger.warning("Could not parse last condition change time. Forcing market update.")
+                cls._last_change_parsed = cls.last_condition_change
+            
+            # If less than 9 hours have passed, don't update
+            if cls._last_change_epoch is not None and time.time() - cls._last_change_epoch < 9 * 3600:
+                return
+        
+        current_time = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
         
         # Choose new market condition weighted by probabilities
-        weights = [c["weight"] for c in conditions]
-        new_condition = random.choices(conditions, weights=weights, k=1)[0]
+        new_condition = random.choices(_CONDITION_NAMES, cum_weights=_CONDITION_CUM_WEIGHTS, k=1)[0]
         
         # Update market state
-        cls.market_condition = new_condition["name"]
-        cls.current_min_change = new_condition["min_change"]
-        cls.current_max_change = new_condition["max_change"]
+        cls.market_condition = new_condition
+        cls.current_min_change, cls.current_max_change = cls.draw_condition_bounds(new_condition)
         cls.last_condition_change = current_time
         
-        # Save the changes
-        cls.save_stocks()
+        # No save here: the only caller (the price update) saves once at the end
         
         # Log the market condition change with more prominent message for crash
         if cls.market_condition == "crash":
@@ -288,11 +430,23 @@ class StockManager:
             logger.info(f"Market condition changed to {cls.market_condition}: " 
                         f"min={cls.current_min_change:.2f}, max={cls.current_max_change:.2f}")
     @classmethod
-    async def update_prices(cls) -> None:
+    async def update_prices(cls) -> Dict[str, List[Tuple[str, int]]]:
         """
         Update all stock prices based on current market condition.
         Allow stocks to go bankrupt if they reach 0 or below.
+        
+        If a bankruptcy is being handled, the update waits for it to finish
+        (the lock is FIFO) and then runs.
+        
+        Returns:
+            Bankruptcy announcements (symbol -> affected users)
         """
+        async with cls._market_lock:
+            return await cls._apply_price_update()
+    
+    @classmethod
+    async def _apply_price_update(cls) -> Dict[str, List[Tuple[str, int]]]:
+        """Apply one round of price changes; caller must hold the market lock"""
         # Check if market condition needs to be updated
         cls.check_market_condition()
         
@@ -304,39 +458,40 @@ class StockManager:
         # Use a copy of the list since we might modify it during iteration
         current_symbols = list(cls.stock_symbols)
         
+        # Bind everything the loop touches to locals once
+        uniform = random.uniform
+        prices = cls.stock_prices
+        price_history = cls.price_history
+        min_change = cls.current_min_change
+        max_change = cls.current_max_change
+        
         for symbol in current_symbols:
             # First check if the stock is already at or below 0
-            if symbol in cls.stock_prices and cls.stock_prices[symbol] <= 0:
+            current_price = prices.get(symbol, 0)
+            if current_price <= 0 and symbol in prices:
                 bankrupt_stocks.append(symbol)
                 continue
                 
             # Get base change within current market condition bounds
-            change = random.uniform(cls.current_min_change, cls.current_max_change)
+            change = uniform(min_change, max_change)
             
             # Apply some stock-specific variation (±20% of the base change)
-            variation = change * random.uniform(-0.2, 0.2)
-            final_change = change + variation
+            final_change = change * uniform(0.8, 1.2)
             
             # Calculate new price
-            current_price = cls.stock_prices.get(symbol, 0)
-            new_price = current_price + final_change
-            new_price = round(new_price, 2)
+            new_price = round(current_price + final_change, 2)
             
             # Check for bankruptcy (price <= 0)
             if new_price <= 0:
                 # Mark for bankruptcy instead of updating the price
                 bankrupt_stocks.append(symbol)
                 # Set the price to exactly 0 for clean handling
-                cls.stock_prices[symbol] = 0
-                cls.price_history[symbol].append(0)
+                prices[symbol] = 0
+                price_history[symbol].append(0)
             else:
                 # Only update the price if it's above 0
-                cls.stock_prices[symbol] = new_price
-                cls.price_history[symbol].append(new_price)
-                
-                # Keep history at last 175 updates for active stocks
-                if len(cls.price_history[symbol]) > 175:
-                    cls.price_history[symbol] = cls.price_history[symbol][-175:]
+                prices[symbol] = new_price
+                price_history[symbol].append(new_price)
         
         # Handle bankrupt stocks
         for symbol in bankrupt_stocks:
@@ -348,8 +503,8 @@ class StockManager:
                 except Exception as e:
                     logger.error(f"Error handling bankruptcy for {symbol}: {e}", exc_info=True)
         
-        # Save the updated stock data
-        cls.save_stocks()
+        # Mark the updated stock data for saving
+        cls.mark_dirty()
         
         # Return bankruptcy announcements for potential notifications
         return bankruptcy_announcements
@@ -369,7 +524,7 @@ class StockManager:
             # Initialize price and history
             starting_price = round(random.uniform(config.NEW_STOCK_MIN_PRICE, config.NEW_STOCK_MAX_PRICE), 2)
             cls.stock_prices[symbol] = starting_price
-            cls.price_history[symbol] = [starting_price]
+            cls.price_history[symbol] = cls.new_history([starting_price])
             
             # Save changes
             cls.save_stocks()
@@ -379,6 +534,21 @@ class StockManager:
             logger.error(f"Error adding new stock {symbol}: {e}")
             return False
     
+    @staticmethod
+    def _purchase_counts(purchase_dates: Dict, symbol: str) -> Dict[str, int]:
+        """
+        Get a user's purchase counts by date for a symbol
+        
+        Purchase dates used to be stored as a list with one entry per purchase;
+        those are migrated in place to a {date: count} mapping.
+        """
+        counts = purchase_dates.get(symbol)
+        if counts is None:
+            counts = purchase_dates[symbol] = {}
+        elif isinstance(counts, list):
+            counts = purchase_dates[symbol] = dict(Counter(counts))
+        return counts
+    
     @classmethod
     def buy_stock(cls, symbol: str, user_id: str) -> float:
         """
@@ -400,35 +570,30 @@ class StockManager:
         
         # Record purchase date in user data
         from data_manager import DataManager
-        data = DataManager.load_data(config.USER_DATA_FILE)
+        data = DataManager.get_cached(config.USER_DATA_FILE)
         if str(user_id) in data:
             # Initialize purchase_dates if it doesn't exist
             if "purchase_dates" not in data[str(user_id)]:
                 data[str(user_id)]["purchase_dates"] = {}
             
             # Get current date
-            utc_now = datetime.now(pytz.utc)
-            eastern = pytz.timezone("America/New_York")
-            est_now = utc_now.astimezone(eastern)
-            today = est_now.strftime("%Y-%m-%d")
+            today = datetime.now(_EASTERN).strftime("%Y-%m-%d")
             
             # Record this purchase
-            if symbol not in data[str(user_id)]["purchase_dates"]:
-                data[str(user_id)]["purchase_dates"][symbol] = []
-            
-            data[str(user_id)]["purchase_dates"][symbol].append(today)
+            counts = cls._purchase_counts(data[str(user_id)]["purchase_dates"], symbol)
+            counts[today] = counts.get(today, 0) + 1
             
-            # Save the updated data
-            DataManager.save_data(config.USER_DATA_FILE, data)
+            # Queue the updated data for saving
+            DataManager.mark_dirty(config.USER_DATA_FILE)
         
         # Increase stock price after purchase (market impact) (@BobBeasta) The full random increase amount
         change = random_increase
-        new_price = cls.stock_prices[symbol] + change
-        cls.stock_prices[symbol] = round(new_price, 2)
-        cls.price_history[symbol].append(round(new_price, 2))
+        new_price = round(cls.stock_prices[symbol] + change, 2)
+        cls.stock_prices[symbol] = new_price
+        cls.price_history[symbol].append(new_price)
         
-        # Save changes
-        cls.save_stocks()
+        # Mark changes for saving
+        cls.mark_dirty()
         return price
         
     @classmethod
@@ -458,25 +623,27 @@ class StockManager:
         
         # Check if this is a same-day sale
         from data_manager import DataManager
-        data = DataManager.load_data(config.USER_DATA_FILE)
+        data = DataManager.get_cached(config.USER_DATA_FILE)
         if str(user_id) in data and "purchase_dates" in data[str(user_id)]:
             purchase_dates = data[str(user_id)].get("purchase_dates", {})
             if symbol in purchase_dates and purchase_dates[symbol]:
-                utc_now = datetime.now(pytz.utc)
-                eastern = pytz.timezone("America/New_York")
-                est_now = utc_now.astimezone(eastern)
-                today = est_now.strftime("%Y-%m-%d")
+                today = datetime.now(_EASTERN).strftime("%Y-%m-%d")
+                counts = cls._purchase_counts(purchase_dates, symbol)
                 
                 # Check if any purchases were made today
-                if today in purchase_dates[symbol]:
+                bought_today = counts.get(today, 0)
+                if bought_today:
                     same_day_sale = True
                     fee = config.SELLING_FEE
                     
-                    # Remove one instance of today's purchase date
-                    purchase_dates[symbol].remove(today)
+                    # Remove one of today's purchases
+                    if bought_today > 1:
+                        counts[today] = bought_today - 1
+                    else:
+                        del counts[today]
                     
-                    # Save the updated purchase dates
-                    DataManager.save_data(config.USER_DATA_FILE, data)
+                    # Queue the updated purchase dates for saving
+                    DataManager.mark_dirty(config.USER_DATA_FILE)
         
         # Calculate sale price after fee (if applicable)
         sale_price = base_price - fee
@@ -492,12 +659,12 @@ class StockManager:
             bankruptcy_triggered = True
             
             # Process the bankruptcy
-            affected_users = await cls.handle_bankruptcy(symbol, bot)
+            affected_users = await cls.delist_stock(symbol, bot)
             
             # Send bankruptcy notification to terminal channel if bot is provided
             if bot:
                 try:
-                    terminal_channel = bot.get_channel(config.TERMINAL_CHANNEL_ID)
+                    terminal_channel = cls.get_terminal_channel(bot)
                     if terminal_channel:
                         embed = discord.Embed(
                             title=f"📉 Stock Bankruptcy: {symbol}",
@@ -507,21 +674,11 @@ class StockManager:
                         
                         # Add information about affected users
                         if affected_users:
-                            user_list = []
-                            for affected_id, shares in affected_users:
-                                try:
-                                    user = await bot.fetch_user(int(affected_id))
-                                    user_list.append(f"{user.mention}: Lost {shares} shares")
-                                except:
-                                    user_list.append(f"User {affected_id}: Lost {shares} shares")
-                            
-                            if user_list:
-                                embed.add_field(
-                                    name="Affected Investors",
-                                    value="\n".join(user_list[:10]) + 
-                                        (f"\n... and {len(user_list) - 10} more" if len(user_list) > 10 else ""),
-                                    inline=False
-                                )
+                            embed.add_field(
+                                name="Affected Investors",
+                                value=await cls.format_affected_investors(bot, affected_users),
+                                inline=False
+                            )
                         
                         # Add footer
                         embed.set_footer(text="All shares have been removed and the stock has been delisted.")
@@ -541,8 +698,8 @@ class StockManager:
         cls.stock_prices[symbol] = new_price
         cls.price_history[symbol].append(new_price)
         
-        # Save changes
-        cls.save_stocks()
+        # Mark changes for saving
+        cls.mark_dirty()
         return sale_price, same_day_sale, bankruptcy_triggered
     
     @classmethod
@@ -565,23 +722,13 @@ class StockManager:
             week_change = ((current_price - history[-7]) / history[-7]) * 100
         
         # Get overall trend direction
-        if len(history) > 10:
-            recent_prices = history[-10:]
-            direction = "neutral"
+        if len(history) > _TREND_WINDOW:
+            # Read the last 10 entries straight off the deque's tail
+            recent_prices = [history[i] for i in range(-_TREND_WINDOW, 0)]
             
             # Simple trend analysis based on last 10 updates
-            upward_moves = sum(1 for i in range(1, len(recent_prices)) 
-                              if recent_prices[i] > recent_prices[i-1])
-            downward_moves = len(recent_prices) - 1 - upward_moves
-            
-            if upward_moves > downward_moves * 1.5:
-                direction = "strong upward"
-            elif upward_moves > downward_moves:
-                direction = "upward"
-            elif downward_moves > upward_moves * 1.5:
-                direction = "strong downward"
-            elif downward_moves > upward_moves:
-                direction = "downward"
+            upward_moves = sum(current > previous for previous, current in zip(recent_prices, recent_prices[1:]))
+            direction = _TREND_BY_UPWARD_MOVES[upward_moves]
         else:
             direction = "insufficient data"
         
@@ -591,29 +738,31 @@ class StockManager:
             "day_change_pct": day_change,
             "week_change_pct": week_change,
             "trend": direction,
-            "history": history,
+            "history": list(history),
             "market_condition": cls.market_condition
         }
     
     @classmethod
     def get_top_performers(cls, timeframe: str = "day") -> List[Dict[str, Any]]:
         """Get top performing stocks for a given timeframe (day, week, all)"""
+        # Pick the reference point in the history once for the timeframe
+        if timeframe == "day":
+            index, min_length = -2, 2
+        elif timeframe == "week":
+            index, min_length = -7, 8
+        elif timeframe == "all":
+            index, min_length = 0, 2
+        else:
+            return []
+        
         results = []
+        price_history = cls.price_history
         
-        for symbol in cls.stock_prices.keys():
-            history = cls.price_history[symbol]
-            current_price = cls.stock_prices[symbol]
-            
-            if timeframe == "day" and len(history) > 1:
-                change_pct = ((current_price - history[-2]) / history[-2]) * 100
-                results.append({"symbol": symbol, "price": current_price, "change_pct": change_pct})
-            
-            elif timeframe == "week" and len(history) > 7:
-                change_pct = ((current_price - history[-7]) / history[-7]) * 100
-                results.append({"symbol": symbol, "price": current_price, "change_pct": change_pct})
-            
-            elif timeframe == "all" and len(history) > 1:
-                change_pct = ((current_price - history[0]) / history[0]) * 100
+        for symbol, current_price in cls.stock_prices.items():
+            history = price_history[symbol]
+            if len(history) >= min_length:
+                reference_price = history[index]
+                change_pct = ((current_price - reference_price) / reference_price) * 100
                 results.append({"symbol": symbol, "price": current_price, "change_pct": change_pct})
         
         # Sort by percent change (descending)
@@ -621,22 +770,57 @@ class StockManager:
         return results
     
     @classmethod
-    def generate_stock_chart(cls, symbol: str) -> BytesIO:
-        """Generate a stock chart for a given symbol"""
-        # Create figure with proper size
-        fig, ax = plt.subplots(figsize=(6, 5))
+    def _get_logo(cls):
+        """Load the chart logo once, returning None if it is missing"""
+        if not cls._logo_loaded:
+            try:
+                cls._logo = mpimg.imread(config.LOGO_FILE)
+            except FileNotFoundError:
+                logger.warning(f"Logo file '{config.LOGO_FILE}' not found, skipping")
+            cls._logo_loaded = True
+        return cls._logo
+    
+    @classmethod
+    def generate_stock_chart(cls, symbol: str, history: Optional[Tuple[float, ...]] = None) -> BytesIO:
+        """
+        Generate a stock chart for a given symbol
+        
+        Args:
+            symbol: The stock symbol to chart
+            history: Price history to draw; defaults to a snapshot of the
+                current history (pass one in when rendering off the event loop)
+        """
+        # Reuse the last render if the history hasn't changed since
+        if history is None:
+            history = tuple(cls.price_history[symbol])
+        cached = cls._chart_cache.get(symbol)
+        if cached and cached[0] == history:
+            return BytesIO(cached[1])
+        
+        png = cls._render_chart(symbol, history)
+        cls._chart_cache[symbol] = (history, png)
+        return BytesIO(png)
+    
+    @classmethod
+    def _render_chart(cls, symbol: str, history: Tuple[float, ...]) -> bytes:
+        """Draw the chart for a price history snapshot and return it as PNG bytes"""
+        # Create figure with proper size, rendered with Agg directly rather
+        # than through pyplot's global figure manager
+        fig = Figure(figsize=(6, 5))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        
+        # Fixed margins leave room for the axis labels and the logo above
+        fig.subplots_adjust(left=0.12, right=0.96, bottom=0.1, top=0.88)
         
         # Add logo if file exists
-        try:
-            logo = mpimg.imread(config.LOGO_FILE)
+        logo = cls._get_logo()
+        if logo is not None:
             logo_ax = fig.add_axes([0.3, 0.9, 0.4, 0.1])
             logo_ax.imshow(logo)
             logo_ax.axis("off")
-        except FileNotFoundError:
-            logger.warning(f"Logo file '{config.LOGO_FILE}' not found, skipping")
         
         # Plot the stock price history
-        history = cls.price_history[symbol]
         x_values = list(range(len(history)))
         
         # Calculate color based on trend
@@ -659,13 +843,27 @@ class StockManager:
             ha='center', va='center', transform=ax.transAxes, fontweight='bold'
         )
         
-        # Save to buffer
+        # Save to buffer; light compression encodes much faster for a
+        # marginally larger file
         buf = BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight')
-        buf.seek(0)
-        plt.close()
-        
-        return buf
+        fig.savefig(buf, format='png', pil_kwargs={"compress_level": 1})
+        return buf.getvalue()
+    
+    @classmethod
+    async def generate_stock_chart_async(cls, symbol: str, history: Optional[Tuple[float, ...]] = None) -> BytesIO:
+        """Generate a stock chart, drawing it in a worker thread if it isn't cached"""
+        # Snapshot on the loop so price updates can't change it mid-draw
+        if history is None:
+            history = tuple(cls.price_history[symbol])
+        cached = cls._chart_cache.get(symbol)
+        if cached and cached[0] == history:
+            return BytesIO(cached[1])
+        
+        png = await asyncio.to_thread(cls._render_chart, symbol, history)
+        # The stock may have gone bankrupt during the render; don't cache it then
+        if symbol in cls.stock_prices:
+            cls._chart_cache[symbol] = (history, png)
+        return BytesIO(png)
 
     @classmethod
     def get_user_portfolio_value(cls, inventory: Dict[str, int]) -> float:
@@ -677,6 +875,97 @@ class StockManager:
                 total_value += stock_value
         return total_value
     
+    @classmethod
+    async def fetch_users(cls, bot, user_ids) -> List[Optional[discord.User]]:
+        """
+        Resolve Discord users concurrently, reusing recently fetched ones
+        
+        Args:
+            bot: Discord bot instance used to fetch users
+            user_ids: User IDs to resolve
+        
+        Returns:
+            List of users in the same order as user_ids (None if a fetch failed)
+        """
+        ids = [int(user_id) for user_id in user_ids]
+        
+        # Fetch every uncached user at once instead of one round-trip each
+        missing = [user_id for user_id in dict.fromkeys(ids) if user_id not in cls._user_cache]
+        if missing:
+            results = await asyncio.gather(*(bot.fetch_user(user_id) for user_id in missing),
+                                           return_exceptions=True)
+            for user_id, result in zip(missing, results):
+                if isinstance(result, BaseException):
+                    logger.debug(f"Could not fetch user {user_id}: {result}")
+                else:
+                    cls._user_cache[user_id] = result
+        
+        users = []
+        for user_id in ids:
+            user = cls._user_cache.get(user_id)
+            if user is not None:
+                cls._user_cache.move_to_end(user_id)
+            users.append(user)
+        
+        # Evict least recently used entries
+        while len(cls._user_cache) > cls.USER_CACHE_SIZE:
+            cls._user_cache.popitem(last=False)
+        
+        return users
+    
+    @staticmethod
+    def batch_embeds(embeds: List[discord.Embed]) -> List[List[discord.Embed]]:
+        """Group embeds into messages that stay within Discord's count and size limits"""
+        batches = []
+        batch = []
+        batch_chars = 0
+        for embed in embeds:
+            size = len(embed)
+            if batch and (len(batch) == _MAX_EMBEDS_PER_MESSAGE
+                          or batch_chars + size > _MAX_EMBED_CHARS_PER_MESSAGE):
+                batches.append(batch)
+                batch = []
+                batch_chars = 0
+            batch.append(embed)
+            batch_chars += size
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    @classmethod
+    async def format_affected_investors(cls, bot, affected_users, limit=10) -> str:
+        """
+        Render the "Affected Investors" field for a bankruptcy announcement
+        
+        Only the first `limit` investors are shown, so only those are fetched.
+        
+        Args:
+            bot: Discord bot instance used to fetch users
+            affected_users: List of (user_id, shares_lost) tuples
+            limit: Maximum number of investors to list
+        
+        Returns:
+            Field text, or an empty string if nobody was affected
+        """
+        display = affected_users[:limit]
+        extra = len(affected_users) - len(display)
+        
+        users = await cls.fetch_users(bot, [user_id for user_id, _ in display])
+        value = "\n".join(
+            f"{user.mention if user else f'User {user_id}'}: Lost {shares} shares"
+            for (user_id, shares), user in zip(display, users)
+        )
+        if extra > 0:
+            value += f"\n... and {extra} more"
+        
+        return value
+    
+    @classmethod
+    async def delist_stock(cls, symbol, bot=None):
+        """Run handle_bankruptcy outside a price update, serialized with other market operations"""
+        async with cls._market_lock:
+            return await cls.handle_bankruptcy(symbol, bot)
+    
     @classmethod
     async def handle_bankruptcy(cls, symbol, bot=None):
         """
@@ -711,7 +1000,7 @@ class StockManager:
                 if bot:
                     # Use the provided bot instance
                     logger.info(f"Using provided bot instance to delete message")
-                    channel = bot.get_channel(config.STOCK_CHANNEL_ID)
+                    channel = cls.get_stock_channel(bot)
                     if channel:
                         try:
                             message = await channel.fetch_message(message_id)
@@ -729,62 +1018,65 @@ class StockManager:
                     
                 # Remove from stock_messages dict regardless of whether deletion succeeded
                 del cls.stock_messages[symbol]
-                cls.save_stock_messages()
-                logger.info(f"Removed {symbol} from stock_messages and saved")
+                from ui_components import ChartView
+                ChartView.forget_message(message_id)
+                cls.mark_messages_dirty()
+                logger.info(f"Removed {symbol} from stock_messages")
             else:
                 logger.info(f"No message ID found for {symbol} in stock_messages")
             
             # 2. Remove stock from all user inventories and purchase dates
             from data_manager import DataManager
-            user_data = DataManager.load_data(config.USER_DATA_FILE)
+            user_data = DataManager.get_cached(config.USER_DATA_FILE)
             bankruptcy_announcement = []
             
             logger.info(f"Checking {len(user_data)} user records for {symbol} shares")
             affected_count = 0
+            purchase_dates_count = 0
+            debug = logger.isEnabledFor(logging.DEBUG)
             
             for user_id, data in user_data.items():
                 # Clean up inventory
-                if "inventory" in data and symbol in data["inventory"]:
+                inventory = data.get("inventory")
+                shares_lost = inventory.pop(symbol, _MISSING) if inventory else _MISSING
+                if shares_lost is not _MISSING:
                     # Record users who lost shares for announcement
-                    shares_lost = data["inventory"][symbol]
                     bankruptcy_announcement.append((user_id, shares_lost))
                     affected_count += 1
-                    
-                    # Remove from inventory
-                    del data["inventory"][symbol]
-                    logger.info(f"Removed bankrupt stock {symbol} from user {user_id}'s inventory ({shares_lost} shares)")
+                    if debug:
+                        logger.debug(f"Removed bankrupt stock {symbol} from user {user_id}'s inventory ({shares_lost} shares)")
                 
                 # Clean up purchase dates
-                if "purchase_dates" in data and symbol in data["purchase_dates"]:
-                    del data["purchase_dates"][symbol]
-                    logger.info(f"Removed purchase dates for {symbol} from user {user_id}")
+                purchase_dates = data.get("purchase_dates")
+                if purchase_dates and purchase_dates.pop(symbol, _MISSING) is not _MISSING:
+                    purchase_dates_count += 1
+                    if debug:
+                        logger.debug(f"Removed purchase dates for {symbol} from user {user_id}")
             
-            logger.info(f"Found {affected_count} users affected by {symbol} bankruptcy")
+            logger.info(f"Removed {symbol} from {affected_count} inventories and {purchase_dates_count} purchase_dates records")
             
-            # Save updated user data
-            DataManager.save_data(config.USER_DATA_FILE, user_data)
-            logger.info(f"Saved updated user data after {symbol} bankruptcy")
+            # Hand updated user data to the background writer
+            DataManager.mark_dirty(config.USER_DATA_FILE)
+            logger.info(f"Queued save of user data after {symbol} bankruptcy")
             
             # 3. Remove from in-memory tracking
-            if symbol in cls.stock_prices:
-                del cls.stock_prices[symbol]
+            if cls.stock_prices.pop(symbol, _MISSING) is not _MISSING:
                 logger.info(f"Removed {symbol} from stock_prices")
             
-            if symbol in cls.price_history:
-                del cls.price_history[symbol]
+            if cls.price_history.pop(symbol, _MISSING) is not _MISSING:
                 logger.info(f"Removed {symbol} from price_history")
+            cls._chart_cache.pop(symbol, None)
             
-            # 4. Remove from stock_symbols list
-            if symbol in cls.stock_symbols:
+            # 4. Remove from stock_symbols list (a single scan, no membership pre-check)
+            try:
                 cls.stock_symbols.remove(symbol)
                 logger.info(f"Removed {symbol} from stock_symbols")
-            else:
+            except ValueError:
                 logger.warning(f"{symbol} not found in stock_symbols")
             
             # 5. Remove from user_to_ticker mapping
             if associated_user_id:
-                if associated_user_id in cls.user_to_ticker:
-                    del cls.user_to_ticker[associated_user_id]
+                if cls.user_to_ticker.pop(associated_user_id, _MISSING) is not _MISSING:
                     logger.info(f"Removed user {associated_user_id} association with {symbol} from user_to_ticker")
                 else:
                     logger.warning(f"User {associated_user_id} not found in user_to_ticker dict")
@@ -802,12 +1094,10 @@ class StockManager:
             logger.error(f"Major error in bankruptcy handling for {symbol}: {e}", exc_info=True)
             # Attempt a simplified removal as a fallback
             try:
-                if symbol in cls.stock_prices:
-                    del cls.stock_prices[symbol]
-                if symbol in cls.price_history:
-                    del cls.price_history[symbol]
-                if symbol in config.STOCK_SYMBOLS:
-                    config.STOCK_SYMBOLS.remove(symbol)
+                cls.stock_prices.pop(symbol, None)
+                cls.price_history.pop(symbol, None)
+                if symbol in cls.stock_symbols:
+                    cls.stock_symbols.remove(symbol)
                 cls.save_stocks()
                 logger.info(f"Performed simplified removal of {symbol} after error")
             except:
@@ -825,33 +1115,44 @@ class StockManager:
         """
         logger.info("🚨 Performing emergency bankruptcy check on all stocks")
         
-        # Check all stocks for negative values
-        bankrupt_stocks = []
-        for symbol, price in list(cls.stock_prices.items()):
-            if price <= 0:
-                logger.warning(f"Found stock {symbol} at price ${price} - flagging for emergency bankruptcy")
-                bankrupt_stocks.append(symbol)
-        
+        # Check all stocks for negative values; nothing else is set up
+        # unless one is found
+        bankrupt_stocks = [symbol for symbol, price in cls.stock_prices.items() if price <= 0]
         if not bankrupt_stocks:
             logger.info("No stocks requiring bankruptcy found")
             return False
         
-        # Handle each bankrupt stock
-        bankruptcy_announcements = {}
         for symbol in bankrupt_stocks:
-            try:
+            logger.warning(f"Found stock {symbol} at price ${cls.stock_prices[symbol]} - flagging for emergency bankruptcy")
+        
+        # Handle bankrupt stocks concurrently (bounded to stay within Discord
+        # rate limits), holding off routine price updates meanwhile. User data
+        # saves are coalesced by the background writer.
+        semaphore = asyncio.Semaphore(5)
+        
+        async def process(symbol):
+            async with semaphore:
                 announcement_data = await cls.handle_bankruptcy(symbol, bot)
-                bankruptcy_announcements[symbol] = announcement_data
-                logger.warning(f"Emergency bankruptcy processed for {symbol}")
-            except Exception as e:
-                logger.error(f"Error handling emergency bankruptcy for {symbol}: {e}", exc_info=True)
+            logger.warning(f"Emergency bankruptcy processed for {symbol}")
+            return announcement_data
+        
+        async with cls._market_lock:
+            results = await asyncio.gather(*(process(symbol) for symbol in bankrupt_stocks), return_exceptions=True)
+        
+        bankruptcy_announcements = {}
+        for symbol, result in zip(bankrupt_stocks, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error handling emergency bankruptcy for {symbol}: {result}", exc_info=result)
+            else:
+                bankruptcy_announcements[symbol] = result
         
         # Handle announcements if bot was provided
         if bot and bankruptcy_announcements:
             try:
                 # Use TERMINAL_CHANNEL_ID instead of STOCK_CHANNEL_ID
-                channel = bot.get_channel(config.TERMINAL_CHANNEL_ID)
+                channel = cls.get_terminal_channel(bot)
                 if channel:
+                    embeds = []
                     for symbol, affected_users in bankruptcy_announcements.items():
                         embed = discord.Embed(
                             title=f"📉 Emergency Delisting: {symbol}",
@@ -860,29 +1161,22 @@ class StockManager:
                         )
                         
                         if affected_users:
-                            user_list = []
-                            for user_id, shares in affected_users:
-                                try:
-                                    user = await bot.fetch_user(int(user_id))
-                                    user_list.append(f"{user.mention}: Lost {shares} shares")
-                                except:
-                                    user_list.append(f"User {user_id}: Lost {shares} shares")
-                            
-                            if user_list:
-                                embed.add_field(
-                                    name="Affected Investors",
-                                    value="\n".join(user_list[:10]) + 
-                                        (f"\n... and {len(user_list) - 10} more" if len(user_list) > 10 else ""),
-                                    inline=False
-                                )
+                            embed.add_field(
+                                name="Affected Investors",
+                                value=await cls.format_affected_investors(bot, affected_users),
+                                inline=False
+                            )
                         
                         embed.set_footer(text="All shares have been removed and the stock has been delisted.")
-                        
+                        embeds.append(embed)
+                    
+                    # Send as few messages as Discord's per-message limits allow
+                    for chunk in cls.batch_embeds(embeds):
                         try:
-                            await channel.send(embed=embed)
-                            logger.info(f"Sent emergency bankruptcy announcement for {symbol}")
+                            await channel.send(embeds=chunk)
+                            logger.info(f"Sent {len(chunk)} emergency bankruptcy announcement(s)")
                         except Exception as e:
-                            logger.error(f"Error sending bankruptcy announcement for {symbol}: {e}")
+                            logger.error(f"Error sending bankruptcy announcements: {e}")
                 else:
                     logger.error(f"Terminal channel with ID {config.TERMINAL_CHANNEL_ID} not found")
             except Exception as e:
@@ -893,19 +1187,34 @@ class StockManager:
     @classmethod
     def get_market_summary(cls) -> Dict[str, Any]:
         """Get a summary of current market conditions"""
+        # Accumulate counts and totals in a single pass over the stocks
         num_stocks = len(cls.stock_prices)
-        up_stocks = sum(1 for s in config.STOCK_SYMBOLS 
-                        if len(cls.price_history[s]) > 1 and 
-                        cls.stock_prices[s] > cls.price_history[s][-2])
-        
-        down_stocks = sum(1 for s in config.STOCK_SYMBOLS 
-                          if len(cls.price_history[s]) > 1 and 
-                          cls.stock_prices[s] < cls.price_history[s][-2])
+        up_stocks = 0
+        down_stocks = 0
+        total_price = 0
+        prev_total = 0
+        have_history_count = 0
+        price_history = cls.price_history
+        
+        for symbol, current_price in cls.stock_prices.items():
+            total_price += current_price
+            
+            history = price_history.get(symbol, ())
+            if len(history) < 2:
+                continue
+            
+            prev_price = history[-2]
+            prev_total += prev_price
+            have_history_count += 1
+            
+            if current_price > prev_price:
+                up_stocks += 1
+            elif current_price < prev_price:
+                down_stocks += 1
         
         flat_stocks = num_stocks - up_stocks - down_stocks
         
         # Get average price and change
-        total_price = sum(cls.stock_prices[s] for s in config.STOCK_SYMBOLS)
         avg_price = total_price / num_stocks if num_stocks > 0 else 0
         
         # Calculate market index (average of all prices)
@@ -913,11 +1222,16 @@ class StockManager:
         
         # Calculate market index change if we have history
         index_change = 0
-        if all(len(cls.price_history[s]) > 1 for s in config.STOCK_SYMBOLS):
-            prev_total = sum(cls.price_history[s][-2] for s in config.STOCK_SYMBOLS)
+        if have_history_count == num_stocks:
             prev_index = prev_total / num_stocks if num_stocks > 0 else 0
             index_change = ((market_index - prev_index) / prev_index) * 100 if prev_index > 0 else 0
         
+        # Only reformat the timestamp once per second
+        sec = int(time.time())
+        if sec != cls._last_ts_sec:
+            cls._last_ts_str = datetime.fromtimestamp(sec, timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+            cls._last_ts_sec = sec
+        
         return {
             "market_condition": cls.market_condition,
             "price_range": {
@@ -932,5 +1246,5 @@ class StockManager:
                 "down": down_stocks,
                 "flat": flat_stocks
             },
-            "last_update": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+            "last_update": cls._last_ts_str
         }
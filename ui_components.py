@@ -2,43 +2,83 @@
 UI components module for Stock Exchange Discord Bot
 Contains all Discord UI components like buttons, views, etc.
 """
+import heapq
+import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Any, Tuple
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, Any, Optional, Tuple
 
 import discord
 from discord.ui import Button, View
 
 import config
+from data_manager import DataManager
 from user_manager import UserManager
 from stock_manager import StockManager
 
 logger = logging.getLogger('stock_exchange.ui')
 
+# Medals shown in place of the rank number for the top 3
+_RANK_EMOJI = ("🥇", "🥈", "🥉")
+
+# Money formatter for rendered prices and totals, e.g. "$12.34 USD"
+_PRICE_FMT = f"${{:.2f}} {config.UOM}".format
+
+# Change suffix for a price that didn't move since the previous update
+_NO_CHANGE = " 📈 0.0%"
+
 class ChartView(View):
     """View for stock charts with buy/sell buttons"""
     
+    # State each chart message was last rendered from, keyed by message ID
+    # (views are recreated per update, so this lives on the class)
+    _last_states: Dict[int, tuple] = {}
+    
+    # Chart redraws waiting on trades to settle, keyed by message ID
+    _pending_updates: Dict[int, asyncio.Task] = {}
+    
+    # Digest of the chart image last uploaded to each message, keyed by message ID
+    _chart_digests: Dict[int, bytes] = {}
+    
+    @classmethod
+    def forget_message(cls, message_id: int) -> None:
+        """Drop the state kept for a chart message that was deleted or replaced"""
+        cls._last_states.pop(message_id, None)
+        cls._chart_digests.pop(message_id, None)
+    
     def __init__(self, symbol: str):
         super().__init__(timeout=None)  # Persistent buttons
         self.symbol = symbol.upper()
         self.message = None  # Store message reference
     
-    async def get_embed(self) -> Tuple[discord.File, discord.Embed]:
-        """Generate the stock chart and return an updated embed"""
-        buf = StockManager.generate_stock_chart(self.symbol)
-        file = discord.File(buf, filename="chart.png")
+    async def get_embed(self) -> Optional[Tuple[discord.File, discord.Embed]]:
+        """
+        Generate the stock chart and return an updated embed
         
-        # Get current price and format
+        Returns None if the stock was delisted while the chart was drawn.
+        """
+        # Snapshot price and history so the embed matches the rendered chart
         price = StockManager.stock_prices[self.symbol]
+        price_history = tuple(StockManager.price_history[self.symbol])
+        
+        buf = await StockManager.generate_stock_chart_async(self.symbol, price_history)
+        if self.symbol not in StockManager.stock_prices:
+            return None
+        file = discord.File(buf, filename="chart.png")
         
         # Check if we have history for percent change
-        price_history = StockManager.price_history[self.symbol]
         change_str = ""
         
         if len(price_history) > 1:
             prev_price = price_history[-2]
-            pct_change = ((price - prev_price) / prev_price) * 100
-            emoji = "📈" if pct_change >= 0 else "📉"
-            change_str = f" {emoji} {pct_change:.1f}%"
+            if prev_price == price:
+                change_str = _NO_CHANGE
+            else:
+                pct_change = ((price - prev_price) / prev_price) * 100
+                emoji = "📈" if pct_change >= 0 else "📉"
+                change_str = f" {emoji} {pct_change:.1f}%"
         
         # Market condition indicator - add crash warning
         market_indicator = ""
@@ -53,60 +93,112 @@ class ChartView(View):
                 title_prefix = f"⚠️ CRITICAL - {market_indicator}"
             else:
                 # Warning range
-                color = discord.Color.orange()
+                color = discord.Color.orange().value
                 title_prefix = f"⚠️ WARNING - {market_indicator}"
         else:
             # Normal range
             color = config.COLOR_INFO
             title_prefix = f"{market_indicator}"
         
-        # Create embed with market condition info
-        embed = discord.Embed(
-            title=f"{title_prefix}{self.symbol} | Price - ${price:.2f} {config.UOM}{change_str}",
-            color=color
-        )
-        embed.set_image(url="attachment://chart.png")
+        # Build the embed payload with market condition info in one go
+        payload = {
+            "title": f"{title_prefix}{self.symbol} | Price - {_PRICE_FMT(price)}{change_str}",
+            "color": color,
+            "image": {"url": "attachment://chart.png"},
+            "fields": []
+        }
         
         # Add bankruptcy warning for stocks with low prices
         if price <= 10:
-            embed.add_field(
-                name="Bankruptcy Risk",
-                value=(f"This stock is at risk of bankruptcy. If the price reaches $0 or below, "
+            payload["fields"].append({
+                "name": "Bankruptcy Risk",
+                "value": (f"This stock is at risk of bankruptcy. If the price reaches $0 or below, "
                     f"the stock will be **delisted** and all shares will be **permanently lost**."),
-                inline=False
-            )
+                "inline": False
+            })
         
         # Add market crash warning if applicable
         if StockManager.market_condition == "crash":
-            embed.add_field(
-                name="🔥 MARKET CRASH WARNING",
-                value="The market is currently experiencing a severe crash. All stocks are facing strong downward pressure.",
-                inline=False
-            )
+            payload["fields"].append({
+                "name": "🔥 MARKET CRASH WARNING",
+                "value": "The market is currently experiencing a severe crash. All stocks are facing strong downward pressure.",
+                "inline": False
+            })
         
         if len(price_history) > 1:
             # Add price info and market info to footer
             start_price = price_history[0]
             overall_change = ((price - start_price) / start_price) * 100
             
-            embed.set_footer(
-                text=f"Starting: ${start_price:.2f} | Overall: {overall_change:.1f}%"
-            )
+            payload["footer"] = {
+                "text": f"Starting: ${start_price:.2f} | Overall: {overall_change:.1f}%"
+            }
         
-        return file, embed
+        return file, discord.Embed.from_dict(payload)
     
     async def update_chart(self) -> None:
         """Edit the existing message with an updated stock chart"""
         if not self.message:
             return
         
-        file, embed = await self.get_embed()
-        await self.message.edit(embed=embed, attachments=[file], view=self)
+        # Skip the edit if nothing shown on the chart has changed
+        state = (
+            StockManager.stock_prices[self.symbol],
+            StockManager.market_condition,
+            tuple(StockManager.price_history[self.symbol])
+        )
+        if ChartView._last_states.get(self.message.id) == state:
+            return
+        
+        result = await self.get_embed()
+        if result is None:
+            return
+        file, embed = result
+        message_id = self.message.id
+        digest = hashlib.blake2b(file.fp.getvalue(), digest_size=16).digest()
+        
+        if ChartView._chart_digests.get(message_id) == digest and self.message.attachments:
+            # Same image as last time (e.g. only the market condition changed),
+            # so keep the existing upload instead of re-sending it. The embed's
+            # attachment://chart.png resolves to the kept file (its CDN URL expires)
+            self.message = await self.message.edit(embed=embed, attachments=self.message.attachments, view=self)
+        else:
+            self.message = await self.message.edit(embed=embed, attachments=[file], view=self)
+            ChartView._chart_digests[message_id] = digest
+        
+        ChartView._last_states[message_id] = state
+    
+    def schedule_update(self) -> None:
+        """
+        Update the chart after a short delay
+        
+        Trades made on the same chart while an update is waiting are folded
+        into it, so a burst of clicks costs one render and one edit.
+        """
+        if not self.message:
+            return
+        
+        message_id = self.message.id
+        if message_id not in ChartView._pending_updates:
+            ChartView._pending_updates[message_id] = asyncio.create_task(
+                self._deferred_update(message_id)
+            )
+    
+    async def _deferred_update(self, message_id: int) -> None:
+        """Wait for trades to settle, then update the chart"""
+        try:
+            await asyncio.sleep(config.CHART_UPDATE_DELAY)
+            # The stock may have gone bankrupt in the meantime
+            if self.symbol in StockManager.stock_prices:
+                await self.update_chart()
+        except Exception as e:
+            logger.error(f"Error updating chart for {self.symbol}: {e}")
+        finally:
+            ChartView._pending_updates.pop(message_id, None)
     
     async def buy_stock(self, interaction: discord.Interaction) -> None:
         """Handle buying a stock and update the price/history"""
         user_id = str(interaction.user.id)
-        from data_manager import DataManager
         DataManager.ensure_user(user_id)
         
         price = StockManager.stock_prices[self.symbol]
@@ -119,8 +211,7 @@ class ChartView(View):
             )
             return
         
-        UserManager.update_balance(user_id, -price)
-        UserManager.add_item(user_id, self.symbol)
+        UserManager.trade(user_id, self.symbol, -price, 1)
         
         # Update stock price - now tracks purchase date
         StockManager.buy_stock(self.symbol, user_id)
@@ -131,12 +222,11 @@ class ChartView(View):
             f"⚠️ *Note: Selling this stock today will incur a ${config.SELLING_FEE:.2f} {config.UOM} day trading fee.*", 
             ephemeral=True
         )
-        await self.update_chart()
+        self.schedule_update()
     
     async def sell_stock(self, interaction: discord.Interaction) -> None:
         """Handle selling a stock and update price/history"""
         user_id = str(interaction.user.id)
-        from data_manager import DataManager
         DataManager.ensure_user(user_id)
         
         inv = UserManager.user_inventory(user_id)
@@ -155,8 +245,7 @@ class ChartView(View):
         )
         
         # Process sale
-        UserManager.update_balance(user_id, final_price)
-        UserManager.remove_item(user_id, self.symbol)
+        UserManager.trade(user_id, self.symbol, final_price, -1)
         
         # Create message based on whether fee was applied
         if same_day_sale:
@@ -174,7 +263,7 @@ class ChartView(View):
         
         # Only update chart if bankruptcy wasn't triggered (otherwise the chart will be deleted)
         if not bankruptcy_triggered:
-            await self.update_chart()
+            self.schedule_update()
     
     @discord.ui.button(label="Buy", style=discord.ButtonStyle.primary)
     async def buy_btn(self, interaction: discord.Interaction, button: Button):
@@ -190,57 +279,53 @@ class BalanceLeaderboardView(View):
     def __init__(self):
         super().__init__(timeout=None)  # Persistent view
         self.message = None
+        self._last_sig = None  # Title and description last sent
+    
+    @staticmethod
+    @lru_cache(maxsize=2048)
+    def _format_line(prefix: str, name: str, total_cents: int) -> str:
+        """Format one leaderboard line (memoized, most rows repeat between refreshes)"""
+        return f"{prefix}{name}: **{_PRICE_FMT(total_cents / 100)}**"
     
     def get_embed(self, guild):
         """Generate the balance leaderboard embed with portfolio values"""
-        from data_manager import DataManager
-        data = DataManager.load_data(config.USER_DATA_FILE)
+        data = UserManager.all_users()
+        prices = StockManager.stock_prices
         
         # Collect user balances and portfolio values
         user_totals = []
         for uid, udata in data.items():
-            # Calculate portfolio value
-            portfolio_value = 0
-            inventory = udata.get("inventory", {})
-            for stock, quantity in inventory.items():
-                if stock in StockManager.stock_prices:
-                    stock_value = StockManager.stock_prices[stock] * quantity
-                    portfolio_value += stock_value
-            
-            # Calculate total worth (cash + portfolio)
-            total_worth = udata["balance"] + portfolio_value
+            # Calculate portfolio value (delisted stocks count as 0)
+            portfolio_value = sum(
+                prices.get(stock, 0) * quantity
+                for stock, quantity in udata.get("inventory", {}).items()
+            )
             
-            user_totals.append((
-                int(uid), 
-                udata["balance"],  # Cash balance
-                portfolio_value,   # Portfolio value
-                total_worth        # Total worth
-            ))
+            # Total worth (cash + portfolio) is all the leaderboard shows
+            user_totals.append((udata["balance"] + portfolio_value, int(uid)))
         
-        # Sort by total worth (highest first)
-        user_totals.sort(key=lambda x: x[3], reverse=True)
+        # Top users by total worth (highest first)
+        user_totals = heapq.nlargest(config.LEADERBOARD_MAX_ENTRIES, user_totals, key=itemgetter(0))
         
         # Create leaderboard content
-        desc = ""
-        rank_emoji = ["🥇", "🥈", "🥉"]
+        lines = []
+        
+        # Resolve the member lookup once for nickname support
+        get_member = guild.get_member if guild else None
         
-        # Show all users
-        for i, (uid, balance, portfolio, total) in enumerate(user_totals):
+        # Show the top users
+        for i, (total, uid) in enumerate(user_totals):
             # Get member object for nickname support if guild is available
-            name = f"User {uid}"
-            if guild:
-                member = guild.get_member(uid)
-                if member:
-                    name = member.display_name
+            member = get_member(uid) if get_member else None
+            name = member.display_name if member else f"User {uid}"
             
             # Add emoji for top 3
-            prefix = f"{rank_emoji[i]} " if i < 3 else f"{i+1}. "
+            prefix = f"{_RANK_EMOJI[i]} " if i < 3 else f"{i+1}. "
             
             # Format with cash + portfolio = total
-            desc += f"{prefix}{name}: **${total:.2f} {config.UOM}**\n"
+            lines.append(self._format_line(prefix, name, round(total * 100)))
         
-        if not desc:
-            desc = "No users found in the database."
+        desc = "\n".join(lines) if lines else "No users found in the database."
         
         # Create embed
         embed = discord.Embed(
@@ -261,7 +346,14 @@ class BalanceLeaderboardView(View):
             return
         
         embed = self.get_embed(guild)
+        
+        # Only edit when the leaderboard content has changed
+        sig = (embed.title, embed.description)
+        if sig == self._last_sig:
+            return
+        
         await self.message.edit(embed=embed, view=self)
+        self._last_sig = sig
 
 
 class StockLeaderboardView(View):
@@ -270,34 +362,49 @@ class StockLeaderboardView(View):
     def __init__(self):
         super().__init__(timeout=None)  # Persistent view
         self.message = None
+        self._last_sig = None  # Title and description last sent
+        
+        # Rendered line (without rank) per symbol, with the prices it shows
+        self._line_cache: Dict[str, Tuple[Tuple[float, Any], str]] = {}
     
     def get_embed(self):
         """Generate the stock leaderboard embed"""
-        # Get all symbols and their prices from StockManager
-        all_symbols = StockManager.get_all_symbols()
-        stock_prices = {}
-        
-        for symbol in all_symbols:
-            if symbol in StockManager.stock_prices:
-                stock_prices[symbol] = StockManager.stock_prices[symbol]
-        
-        # Sort stocks by price (highest first)
-        sorted_stocks = sorted(stock_prices.items(), key=lambda x: x[1], reverse=True)
+        # Top stocks by price (highest first), straight from StockManager
+        sorted_stocks = heapq.nlargest(
+            config.LEADERBOARD_MAX_ENTRIES,
+            StockManager.stock_prices.items(),
+            key=itemgetter(1)
+        )
         
-        # Create description
-        desc = ""
+        # Create description, reformatting only stocks whose prices moved
+        lines = []
+        line_cache = {}
+        price_history = StockManager.price_history
         for i, (symbol, price) in enumerate(sorted_stocks):
-            change = ""
-            if len(StockManager.price_history[symbol]) > 1:
-                prev_price = StockManager.price_history[symbol][-2]
-                pct_change = ((price - prev_price) / prev_price) * 100
-                emoji = "📈" if pct_change >= 0 else "📉"
-                change = f" {emoji} {pct_change:.1f}%"
+            history = price_history[symbol]
+            prev_price = history[-2] if len(history) > 1 else None
+            
+            key = (price, prev_price)
+            cached = self._line_cache.get(symbol)
+            if cached is not None and cached[0] == key:
+                line = cached[1]
+            else:
+                change = ""
+                if prev_price == price:
+                    change = _NO_CHANGE
+                elif prev_price is not None:
+                    pct_change = ((price - prev_price) / prev_price) * 100
+                    emoji = "📈" if pct_change >= 0 else "📉"
+                    change = f" {emoji} {pct_change:.1f}%"
+                line = f"{symbol}: **{_PRICE_FMT(price)}**{change}"
             
-            desc += f"{i+1}. {symbol}: **${price:.2f} {config.UOM}**{change}\n"
+            line_cache[symbol] = (key, line)
+            lines.append(f"{i+1}. {line}")
         
-        if not desc:
-            desc = "No active stocks found."
+        # Rebuilt each render so delisted stocks drop out
+        self._line_cache = line_cache
+        
+        desc = "\n".join(lines) if lines else "No active stocks found."
         
         # Create embed
         embed = discord.Embed(
@@ -318,16 +425,33 @@ class StockLeaderboardView(View):
             return
         
         embed = self.get_embed()
+        
+        # Only edit when the leaderboard content has changed
+        sig = (embed.title, embed.description)
+        if sig == self._last_sig:
+            return
+        
         await self.message.edit(embed=embed, view=self)
+        self._last_sig = sig
 
 class HelpView(View):
     """Command help view"""
     
+    # Built on first use; the help text only depends on config
+    _embed = None
+    
     def __init__(self):
         super().__init__(timeout=120)
     
     def get_embed(self):
         """Get the help embed"""
+        if HelpView._embed is None:
+            HelpView._embed = self._build_embed()
+        return HelpView._embed
+    
+    @staticmethod
+    def _build_embed():
+        """Build the help embed"""
         embed = discord.Embed(
             title=f"{config.NAME} Exchange Commands",
             color=config.COLOR_INFO
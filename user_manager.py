@@ -10,95 +10,148 @@ from data_manager import DataManager
 
 logger = logging.getLogger('stock_exchange.user')
 
+def _uid(user_id: Union[int, str]) -> str:
+    """Normalize a user ID to the string key used in the user data"""
+    return user_id if type(user_id) is str else str(user_id)
+
 class UserManager:
-    """Class to handle user-related operations"""
+    """
+    Class to handle user-related operations
+    
+    All reads and writes go through the shared in-memory copy of the user
+    data; changes are written back by DataManager's background writer and
+    flushed on shutdown.
+    """
+    
+    @staticmethod
+    def all_users() -> Dict[str, Dict]:
+        """Get the live data for every user, keyed by user ID"""
+        return DataManager.get_cached(config.USER_DATA_FILE)
+    
+    @staticmethod
+    def migrate_users() -> None:
+        """Fill in account fields missing from older user records"""
+        changed = False
+        for user in UserManager.all_users().values():
+            if "balance" not in user or "bank" not in user or "inventory" not in user:
+                # Same fallback balance get_balance used to apply on read
+                user.setdefault("balance", 100)
+                user.setdefault("bank", 0)
+                user.setdefault("inventory", {})
+                changed = True
+        
+        if changed:
+            DataManager.mark_dirty(config.USER_DATA_FILE)
+            logger.info("Filled in missing fields in user data")
     
     @staticmethod
     def get_balance(user_id: Union[int, str]) -> float:
         """Get the balance of a user"""
-        data = DataManager.load_data(config.USER_DATA_FILE)
-        return data[str(user_id)].get("balance", 100)
+        data = UserManager.all_users()
+        return data[_uid(user_id)]["balance"]
     
     @staticmethod
     def update_balance(user_id: Union[int, str], amount: float) -> None:
         """Update the balance of a user"""
-        data = DataManager.load_data(config.USER_DATA_FILE)
-        data[str(user_id)]["balance"] += amount
-        DataManager.save_data(config.USER_DATA_FILE, data)
-        logger.debug(f"Updated balance for user {user_id} by {amount}")
+        if amount == 0:
+            return
+        
+        data = UserManager.all_users()
+        data[_uid(user_id)]["balance"] += amount
+        DataManager.mark_dirty(config.USER_DATA_FILE)
+        logger.debug("Updated balance for user %s by %s", user_id, amount)
     
     @staticmethod
     def get_bank(user_id: Union[int, str]) -> float:
         """Get the bank balance of a user"""
-        data = DataManager.load_data(config.USER_DATA_FILE)
-        return data[str(user_id)]["bank"]
+        data = UserManager.all_users()
+        return data[_uid(user_id)]["bank"]
     
     @staticmethod
     def deposit(user_id: Union[int, str], amount: float) -> bool:
         """Deposit amount from balance to bank"""
-        data = DataManager.load_data(config.USER_DATA_FILE)
-        uid = str(user_id)
-        
-        if data[uid]["balance"] >= amount:
-            data[uid]["balance"] -= amount
-            data[uid]["bank"] += amount
-            DataManager.save_data(config.USER_DATA_FILE, data)
-            logger.info(f"User {uid} deposited {amount} to bank")
-            return True
-        
-        logger.debug(f"User {uid} failed to deposit {amount} (insufficient funds)")
-        return False
+        return UserManager._transfer(user_id, amount, "balance", "bank")
     
     @staticmethod
     def withdraw(user_id: Union[int, str], amount: float) -> bool:
         """Withdraw amount from bank to balance"""
-        data = DataManager.load_data(config.USER_DATA_FILE)
-        uid = str(user_id)
+        return UserManager._transfer(user_id, amount, "bank", "balance")
+    
+    @staticmethod
+    def _transfer(user_id: Union[int, str], amount: float, src: str, dst: str) -> bool:
+        """Move amount between two of a user's accounts if the source can cover it"""
+        # Nothing to move (and a negative amount would run the transfer backwards)
+        if amount <= 0:
+            return False
+        
+        uid = _uid(user_id)
+        account = UserManager.all_users()[uid]
         
-        if data[uid]["bank"] >= amount:
-            data[uid]["bank"] -= amount
-            data[uid]["balance"] += amount
-            DataManager.save_data(config.USER_DATA_FILE, data)
-            logger.info(f"User {uid} withdrew {amount} from bank")
+        if account[src] >= amount:
+            account[src] -= amount
+            account[dst] += amount
+            DataManager.mark_dirty(config.USER_DATA_FILE)
+            logger.info(f"User {uid} moved {amount} from {src} to {dst}")
             return True
         
-        logger.debug(f"User {uid} failed to withdraw {amount} (insufficient funds)")
+        logger.debug("User %s failed to move %s from %s to %s (insufficient funds)", uid, amount, src, dst)
         return False
     
     @staticmethod
     def user_inventory(user_id: Union[int, str]) -> Dict[str, int]:
         """Get the inventory of a user"""
-        data = DataManager.load_data(config.USER_DATA_FILE)
-        return data[str(user_id)]["inventory"]
+        data = UserManager.all_users()
+        return data[_uid(user_id)]["inventory"]
     
     @staticmethod
     def add_item(user_id: Union[int, str], item: str) -> None:
         """Add an item to a user's inventory"""
-        data = DataManager.load_data(config.USER_DATA_FILE)
-        uid = str(user_id)
+        data = UserManager.all_users()
+        uid = _uid(user_id)
         inv = data[uid]["inventory"]
+        inv[item] = inv.get(item, 0) + 1
         
-        if item in inv:
-            inv[item] += 1
-        else:
-            inv[item] = 1
-        
-        DataManager.save_data(config.USER_DATA_FILE, data)
+        DataManager.mark_dirty(config.USER_DATA_FILE)
         logger.info(f"Added {item} to user {uid}'s inventory")
     
     @staticmethod
     def remove_item(user_id: Union[int, str], item: str) -> None:
         """Remove an item from a user's inventory"""
-        data = DataManager.load_data(config.USER_DATA_FILE)
-        uid = str(user_id)
+        data = UserManager.all_users()
+        uid = _uid(user_id)
         inv = data[uid]["inventory"]
         
-        if item in inv:
-            if inv[item] > 1:
-                inv[item] -= 1
+        quantity = inv.get(item, 0)
+        if quantity:
+            if quantity > 1:
+                inv[item] = quantity - 1
                 logger.info(f"Decreased {item} quantity for user {uid}")
             else:
                 del inv[item]
                 logger.info(f"Removed {item} from user {uid}'s inventory")
             
-            DataManager.save_data(config.USER_DATA_FILE, data)
\ No newline at end of file
+            DataManager.mark_dirty(config.USER_DATA_FILE)
+    
+    @staticmethod
+    def trade(user_id: Union[int, str], item: str, cash_delta: float, item_delta: int) -> None:
+        """
+        Apply a trade's balance and inventory changes together
+        
+        Both changes go to the shared user data in one pass and are written
+        with a single queued save, instead of a load and save for each.
+        """
+        data = DataManager.get_cached(config.USER_DATA_FILE)
+        uid = _uid(user_id)
+        user = data[uid]
+        
+        user["balance"] += cash_delta
+        
+        inv = user["inventory"]
+        quantity = inv.get(item, 0) + item_delta
+        if quantity > 0:
+            inv[item] = quantity
+        else:
+            inv.pop(item, None)
+        
+        DataManager.mark_dirty(config.USER_DATA_FILE)
+        logger.info(f"Trade for user {uid}: {item_delta:+d} {item}, balance {cash_delta:+.2f}")
\ No newline at end of file
@@ -5,29 +5,31 @@ import asyncio
 import logging
 import discord
 
-import config
 from ui_components import ChartView
 from stock_manager import StockManager
 
 logger = logging.getLogger('ch3f_exchange.utilities')
 
-async def create_stock_screener(ctx, symbol, bot=None):
-    """Create a stock screener message for the new stock"""
-    # Get stock channel
+async def create_stock_screener(ctx, symbol, bot):
+    """Create a stock screener message for the new stock using the running bot"""
+    # Never start a second client here; the screener must go through the running bot
     if bot is None:
-        # This is a fallback, but we should pass bot from process_command
-        from main import create_bot
-        bot = create_bot()
-        await bot.login(config.TOKEN)
+        logger.error(f"Failed to create stock screener for {symbol}: No bot instance passed")
+        return
     
-    channel = bot.get_channel(config.STOCK_CHANNEL_ID)
+    # Get stock channel (cached by StockManager)
+    channel = StockManager.get_stock_channel(bot)
     if not channel:
         logger.error(f"Failed to create stock screener for {symbol}: Stock channel not found")
         return
     
     # Create and send chart
     view = ChartView(symbol)
-    file, embed = await view.get_embed()
+    result = await view.get_embed()
+    if result is None:
+        logger.info(f"Not creating stock screener for {symbol}: it was delisted")
+        return
+    file, embed = result
     
     try:
         message = await channel.send(embed=embed, file=file, view=view)
@@ -35,7 +37,7 @@ async def create_stock_screener(ctx, symbol, bot=None):
         view.message = message
         logger.info(f"Created stock screener for {symbol}")
         
-        # Save message IDs
-        StockManager.save_stock_messages()
+        # Queue the message IDs for the next periodic flush
+        StockManager.mark_messages_dirty()
     except Exception as e:
         logger.error(f"Error creating stock screener for {symbol}: {e}")
\ No newline at end of file